@@ -6,7 +6,11 @@ from asyncio import Semaphore
 async def pastToken(chain, contract_address, TOKEN_SNIFFER_API, ETHERSCAN_API_KEY, BASESCAN_API_KEY, PENDING_TS, retry_interval=30, max_retries=120):
     pass
 
-async def api(chain, contract_address, TOKEN_SNIFFER_API, ETHERSCAN_API_KEY, BASESCAN_API_KEY, PENDING_TS, retry_interval=30, max_retries=120):
+async def api(chain, contract_address, TOKEN_SNIFFER_API, ETHERSCAN_API_KEY, BASESCAN_API_KEY, PENDING_TS, retry_interval=30, max_retries=120, outcome=None):
+    # outcome, when given, is filled with the reason a None result was returned
+    if outcome is None:
+        outcome = {}
+    outcome["honeypot"] = False
     retries = 0
     source_code = None  # Initialize source_code as None
     while retries < max_retries:
@@ -30,7 +34,7 @@ async def api(chain, contract_address, TOKEN_SNIFFER_API, ETHERSCAN_API_KEY, BAS
         # If Hacker API indicates honeypot or data is unavailable
         if hacker_data and not hacker_data.get("is_safe", True) and hacker_data.get("liquidity", "N/A") != "N/A":
             print(f"Hacker API detected honeypot for {contract_address}. No further checks.")
-            
+            outcome["honeypot"] = True
             
             return None  # Exit early if honeypot detected
 
@@ -40,7 +44,7 @@ async def api(chain, contract_address, TOKEN_SNIFFER_API, ETHERSCAN_API_KEY, BAS
         # If Honeypot.is API indicates honeypot
         if honey_data and honey_data.get("honeypot_result", True):  # True means it's a honeypot
             print(f"Honeypot.is API detected honeypot for {contract_address}. No further checks.")
-            
+            outcome["honeypot"] = True
             return None  # Exit early if honeypot detected
 
         # If both APIs return data and no honeypot is detected, break the retry loop
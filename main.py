@@ -10,6 +10,8 @@ from aiogram import Router
 import aiohttp
 from bs4 import BeautifulSoup
 from checker import api
+from records import TokenRecord
+from retention import ensure_indexes, rejected_record, payload_document, archive_contracts, contract_exists, find_contract
 from datetime import datetime, timedelta, timezone
 
 from dotenv import set_key, load_dotenv
@@ -40,6 +42,9 @@ web3_base = Web3(Web3.HTTPProvider(ALCHEMY_BASE_URL))
 client = MongoClient(MONGO_URI)
 db = client['contract_monitor']
 contracts_collection = db['contracts']
+deployers_collection = db['deployers']
+archive_collection = db['contracts_archive']
+payloads_collection = db['contract_payloads']
 
 # Aiogram setup
 bot = Bot(token=TELEGRAM_TOKEN)
@@ -59,58 +64,115 @@ RETRY_BLOCK_DELAY = int(os.getenv("RETRY_BLOCK_DELAY"))
 
 PENDING_TS = {"count": 0}
 
+DEPLOYER_MIN_TOKENS = int(os.getenv("DEPLOYER_MIN_TOKENS", 3))  # Launches needed before a deployer can be flagged
+DEPLOYER_MAX_HONEYPOT_RATE = int(os.getenv("DEPLOYER_MAX_HONEYPOT_RATE", 50))  # Percent of honeypots that flags a deployer
+DEPLOYER_RESCORE_AFTER = int(os.getenv("DEPLOYER_RESCORE_AFTER", 21600))  # Let one launch from a flagged deployer through every 6 hours
 
+REJECTED_TTL = int(os.getenv("REJECTED_TTL", 86400))  # 1 day default
+ARCHIVE_AFTER = int(os.getenv("ARCHIVE_AFTER", 604800))  # 7 days default
 
-def normalize_data(data):
+# Per-deployer aggregates, mirrored in deployers_collection
+DEPLOYER_STATS = {}
+
+
+
+def load_deployer_stats():
+    """
+    Loads the persisted per-deployer aggregates into memory.
+    """
+    for doc in deployers_collection.find({}, {"_id": 0}):
+        # Upserts only write the fields they touched, so fill in the rest
+        DEPLOYER_STATS[doc["deployer"]] = {**empty_deployer_stats(doc["deployer"]), **doc}
+    print(f"Loaded stats for {len(DEPLOYER_STATS)} deployers")
+
+
+def empty_deployer_stats(deployer):
+    """
+    Returns a zeroed aggregate for a deployer.
     """
-    Recursively normalizes data, converting large integers to strings to avoid MongoDB OverflowError.
+    return {
+        "deployer": deployer,
+        "launched": 0,
+        "honeypots": 0,
+        "notified": 0,
+        "skipped": 0,
+        "last_seen": 0,
+        "last_scored": 0,
+    }
+
+
+def update_deployer_stats(deployer, last_seen=None, last_scored=None, **counts):
     """
-    if isinstance(data, dict):
-        return {key: normalize_data(value) for key, value in data.items()}
-    elif isinstance(data, list):
-        return [normalize_data(item) for item in data]
-    elif isinstance(data, int):
-        # Convert integers that exceed MongoDB's 8-byte limit to strings
-        if data > 2**63 - 1 or data < -(2**63):
-            return str(data)
-    return data
-
-
-def formatToken(data):
+    Incrementally updates a deployer's counters and timestamps in memory and in MongoDB.
+    """
+    stats = DEPLOYER_STATS.setdefault(deployer, empty_deployer_stats(deployer))
+    for key, value in counts.items():
+        stats[key] = stats.get(key, 0) + value
+
+    update = {}
+    if counts:
+        update["$inc"] = counts
+    timestamps = {key: value for key, value in (("last_seen", last_seen), ("last_scored", last_scored)) if value is not None}
+    for key, value in timestamps.items():
+        stats[key] = max(stats.get(key, 0), value)
+    if timestamps:
+        update["$max"] = timestamps
+    deployers_collection.update_one({"deployer": deployer}, update, upsert=True)
+
+
+def deployer_has_bad_rate(deployer):
+    """
+    Returns True when a deployer has launched enough tokens with a high enough honeypot rate.
+    """
+    stats = DEPLOYER_STATS.get(deployer)
+    if not stats or stats["launched"] < DEPLOYER_MIN_TOKENS:
+        return False
+    return stats["honeypots"] * 100 >= stats["launched"] * DEPLOYER_MAX_HONEYPOT_RATE
+
+
+def deployer_is_flagged(deployer):
+    """
+    Returns True when a deployment from this deployer should be skipped.
+    A flagged deployer gets one launch re-scored every DEPLOYER_RESCORE_AFTER seconds so its rate can recover.
+    """
+    if not deployer_has_bad_rate(deployer):
+        return False
+    now = int(datetime.now(tz=timezone.utc).timestamp())
+    if now - DEPLOYER_STATS[deployer].get("last_scored", 0) >= DEPLOYER_RESCORE_AFTER:
+        # Mark before analysis so concurrent launches from this deployer stay skipped
+        update_deployer_stats(deployer, last_scored=now)
+        return False
+    return True
+
+
+def formatToken(record):
     # Chain-specific coloring for notifications
-    chain_display = "🟦 BASE" if data['chain'].upper() == "BASE" else "🟩 ETH"
+    chain_display = "🟦 BASE" if record.chain.upper() == "BASE" else "🟩 ETH"
 
-    msg = f"{chain_display}: ${data['details'].get('symbol', 'N/A')} {data['details'].get('name', 'N/A')}\n\n"
+    msg = f"{chain_display}: ${record.symbol or 'N/A'} {record.name or 'N/A'}\n\n"
 
     # Add source code links if verified
-    if data["verified"]:
-        if data['chain'].upper() == "ETH":
-            msg += f"[Source Code](https://etherscan.io/address/{data['address']}#code)\n"
-        elif data['chain'].upper() == "BASE":
-            msg += f"[Source Code](https://basescan.org/address/{data['address']}#code)\n"
+    if record.verified:
+        if record.chain.upper() == "ETH":
+            msg += f"[Source Code](https://etherscan.io/address/{record.address}#code)\n"
+        elif record.chain.upper() == "BASE":
+            msg += f"[Source Code](https://basescan.org/address/{record.address}#code)\n"
 
     # TokenSniffer details
-    if data["tokensniffer"]:
-        score = data["tokensniffer"].get('score', 0)
-        similar_tokens = data["tokensniffer"].get('similar', [])
-        similar_count = len(similar_tokens)
+    if record.score is not None:
+        score = record.score
+        similar_count = record.similar_count
 
         msg += f"Score: {score}\n"
         msg += f"Similar Tokens: {similar_count}\n"
-        msg += f"Token Address: {data['address']}\n"
+        msg += f"Token Address: {record.address}\n"
 
         # Liquidity from hacker or honeypot APIs
-        liquidity = "N/A"
-        if data.get("hacker"):
-            liquidity = data["hacker"].get("liquidity", "N/A")
-        elif data.get("honeypot"):
-            liquidity = data["honeypot"].get("pair", {}).get("liquidity", "N/A")
-
-        msg += f"Total liquidity: {liquidity}\n"
+        msg += f"Total liquidity: {record.liquidity}\n"
 
         # TokenSniffer link
-        chain_id = 1 if data['chain'].upper() == "ETH" else 8453
-        msg += f"[tokensniffer.com](https://tokensniffer.com/token/{chain_id}/{data['address']})\n"
+        chain_id = 1 if record.chain.upper() == "ETH" else 8453
+        msg += f"[tokensniffer.com](https://tokensniffer.com/token/{chain_id}/{record.address})\n"
 
         # Check if the token passes thresholds
         if score >= MINIMUM_SCORE and similar_count <= MAXIMUM_SIMILAR:
@@ -136,8 +198,11 @@ async def check_past_tokens():
         past_tokens = contracts_collection.find({
             "timestamp": {"$gte": threshold_time},
             "notified": {"$exists": False},  # Ensure it's not already notified
-            "tokensniffer": {"$exists": True, "$ne": None}
-        })
+            "$or": [
+                {"score": {"$ne": None}},
+                {"tokensniffer": {"$exists": True, "$ne": None}},  # Documents stored before records existed
+            ],
+        }, {"address": 1, "chain": 1, "deployer": 1})
         
         for token in past_tokens:
             contract_address = token["address"]
@@ -149,10 +214,27 @@ async def check_past_tokens():
                 
                 
                 # Format and send a notification if the new score meets the threshold
-                updated_token = contracts_collection.find_one({"address": contract_address})
+                updated_token = TokenRecord.from_document(find_contract(contracts_collection, archive_collection, contract_address))
+                updated_token.set_api_checks(past_api_checks)
                 details_message = formatToken(updated_token)
                 if details_message:
-                    contracts_collection.update_one({"address": contract_address}, {"$set": {"tokensniffer": past_api_checks["tokensniffer"], "notified": True}})
+                    contracts_collection.update_one({"address": contract_address}, {
+                        "$set": {
+                            "score": updated_token.score,
+                            "similar_count": updated_token.similar_count,
+                            "liquidity": updated_token.liquidity,
+                            "notified": True,
+                        },
+                        # Legacy documents kept these inline; the fresh copies go to the side collection
+                        "$unset": {"source_code": "", "hacker": "", "honeypot": "", "tokensniffer": ""},
+                    })
+                    payloads_collection.update_one(
+                        {"address": contract_address},
+                        {"$set": payload_document(contract_address, **past_api_checks)},
+                        upsert=True,
+                    )
+                    if token.get("deployer"):
+                        update_deployer_stats(token["deployer"], notified=1)
                     await send_notification(details_message)
             #Breath
             await asyncio.sleep(1)
@@ -160,6 +242,21 @@ async def check_past_tokens():
         await asyncio.sleep(INTERVAL)
 
 
+async def archive_old_contracts():
+    while True:
+        # Never archive contracts still inside the recheck window
+        cutoff = int(datetime.now(tz=timezone.utc).timestamp()) - max(ARCHIVE_AFTER, OLD_TIME)
+        try:
+            # Run in a thread so a large backlog doesn't block polling and monitoring
+            archived = await asyncio.to_thread(archive_contracts, contracts_collection, archive_collection, payloads_collection, cutoff)
+            if archived:
+                print(f"Archived {archived} contracts older than {cutoff}")
+        except Exception as e:
+            print(f"Error archiving contracts: {e}")
+
+        await asyncio.sleep(INTERVAL)
+
+
 async def monitor_blocks(web3_instance, chain):
     latest_block = web3_instance.eth.block_number
     while monitoring[chain]:
@@ -177,50 +274,43 @@ async def monitor_blocks(web3_instance, chain):
     return  # Exit the function immediately
 
 async def analyze_contract(deployer, tx_hash, chain):
+    # Known-bad deployers are skipped before any RPC or API call
+    if deployer_is_flagged(deployer):
+        print(f"Skipping deployment {tx_hash.hex()} from flagged deployer {deployer}")
+        update_deployer_stats(deployer, last_seen=int(datetime.now(tz=timezone.utc).timestamp()), skipped=1)
+        return
+
     web3_instance = web3_eth if chain == "eth" else web3_base
     receipt = web3_instance.eth.get_transaction_receipt(tx_hash)
     contract_address = receipt.contractAddress
     if contract_address:
-        existing_contract = contracts_collection.find_one({"address": contract_address})
-        if existing_contract:
+        if contract_exists(contracts_collection, archive_collection, contract_address):
             return  # Skip duplicates
 
         is_erc20, details = check_erc20(contract_address, web3_instance)
         timestamp = web3_instance.eth.get_block(receipt.blockNumber).timestamp
-        contract_data = {
-            "address": contract_address,
-            "deployer": deployer,
-            "timestamp": timestamp,
-            "verified": False,
-            "details": None,
-            "hacker": None,
-            "tokensniffer": None,
-            "retries": 0,
-            "chain": chain
-        }
         if is_erc20:
-            contract_data["details"] = details
-            
-
-            api_checks = await api(chain, contract_address, TOKEN_SNIFFER_API, ETHERSCAN_API_KEY, BASESCAN_API_KEY, PENDING_TS,  RETRY_INTERVAL, RETRY_LIMIT)
+            record = TokenRecord(contract_address, deployer, timestamp, chain, details)
 
-            if api_checks is not None:
-                api_checks = normalize_data(api_checks)
-                contract_data["verified"] = True
-                contract_data["source_code"] = api_checks["source_code"]
+            api_outcome = {}
+            api_checks = await api(chain, contract_address, TOKEN_SNIFFER_API, ETHERSCAN_API_KEY, BASESCAN_API_KEY, PENDING_TS,  RETRY_INTERVAL, RETRY_LIMIT, api_outcome)
 
+            if api_checks is None:
+                reason = "honeypot" if api_outcome.get("honeypot") else "unverified"
+                contracts_collection.insert_one(rejected_record(record.to_document(), reason, REJECTED_TTL))
+                update_deployer_stats(deployer, last_seen=timestamp, launched=1, honeypots=int(api_outcome.get("honeypot", False)))
+            else:
+                record.set_api_checks(api_checks)
 
-                contract_data["hacker"] = api_checks["hacker"]
-                contract_data["honeypot"] = api_checks["honeypot"]
-                contract_data["tokensniffer"] = api_checks["tokensniffer"]
-                
-               
-                details_message = formatToken(contract_data)
+                details_message = formatToken(record)
 
                 if details_message is not None:
                     await send_notification(details_message)
-                    contract_data["notified"] = True
-                contracts_collection.insert_one(contract_data)
+                    record.notified = True
+                contracts_collection.insert_one(record.to_document())
+                # Keep the hot collection slim: source and raw payloads go to the side collection
+                payloads_collection.insert_one(payload_document(contract_address, **api_checks))
+                update_deployer_stats(deployer, last_seen=timestamp, launched=1, notified=int(record.notified))
             
             
 
@@ -318,6 +408,7 @@ async def show_status(callback_query: types.CallbackQuery):
         f"Ethereum: {eth_status}\n"
         f"Base: {base_status}\n\n"
         f"Pending Tokens: {PENDING_TS['count']}\n"
+        f"Flagged Deployers: {sum(1 for deployer in DEPLOYER_STATS if deployer_has_bad_rate(deployer))}\n"
         f"TokenSniffer Limit/Used/Remaining: {limit}/{used}/{int(limit)-int(used)}"
     )
 
@@ -367,6 +458,11 @@ async def config_command(message: types.Message):
                     "RETRY_BLOCK_DELAY",
                     "OLD_TIME",
                     "INTERVAL",
+                    "DEPLOYER_MIN_TOKENS",
+                    "DEPLOYER_MAX_HONEYPOT_RATE",
+                    "DEPLOYER_RESCORE_AFTER",
+                    "REJECTED_TTL",
+                    "ARCHIVE_AFTER",
                 ]
             ]
         )
@@ -417,6 +513,9 @@ dp.include_router(router)
 
 if __name__ == "__main__":
     async def main():
+        ensure_indexes(contracts_collection, archive_collection, payloads_collection, deployers_collection)
+        load_deployer_stats()
+        asyncio.create_task(archive_old_contracts())
         asyncio.create_task(check_past_tokens())
         await dp.start_polling(bot)
 
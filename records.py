@@ -0,0 +1,150 @@
+import json
+
+MONGO_INT_MAX = 2**63 - 1
+MONGO_INT_MIN = -(2**63)
+
+# Raw provider payloads, stored outside the record as opaque JSON bytes
+PROVIDERS = ("hacker", "honeypot", "tokensniffer")
+
+
+def mongo_int(value):
+    """
+    Converts integers that exceed MongoDB's 8-byte limit to strings.
+    """
+    if isinstance(value, int) and (value > MONGO_INT_MAX or value < MONGO_INT_MIN):
+        return str(value)
+    return value
+
+
+def as_score(value):
+    """
+    Coerces a score to a number; oversized scores are stored as strings by mongo_int.
+    """
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return 0
+
+
+def encode_payload(data):
+    """
+    Serializes a provider response to compact JSON bytes, or None if there is no data.
+    """
+    if data is None:
+        return None
+    if isinstance(data, bytes):
+        return data
+    if isinstance(data, str):
+        return data.encode()
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+def decode_payload(payload):
+    """
+    Rebuilds a provider response from its stored bytes.
+    """
+    if isinstance(payload, dict):
+        return payload
+    return json.loads(payload) if payload else None
+
+
+class TokenRecord:
+    """
+    A contract analysis result holding only the fields used for filtering and notifications.
+    """
+    __slots__ = (
+        "address", "deployer", "timestamp", "chain", "verified", "notified",
+        "name", "symbol", "decimals",
+        "score", "similar_count", "liquidity",
+    )
+
+    def __init__(self, address, deployer, timestamp, chain, details=None):
+        self.address = address
+        self.deployer = deployer
+        self.timestamp = timestamp
+        self.chain = chain
+        self.verified = False
+        self.notified = False
+        details = details or {}
+        self.name = details.get("name")
+        self.symbol = details.get("symbol")
+        self.decimals = details.get("decimals")
+        self.score = None
+        self.similar_count = 0
+        self.liquidity = "N/A"
+
+    def set_api_checks(self, api_checks):
+        """
+        Extracts the used fields from an api() result. Source and provider responses are stored separately.
+        """
+        self.verified = True
+
+        hacker = api_checks["hacker"]
+        honeypot = api_checks["honeypot"]
+        self.set_tokensniffer(api_checks["tokensniffer"])
+
+        # Liquidity from hacker or honeypot APIs
+        self.liquidity = "N/A"
+        if hacker:
+            self.liquidity = hacker.get("liquidity", "N/A")
+        elif honeypot:
+            self.liquidity = honeypot.get("pair", {}).get("liquidity", "N/A")
+
+    def set_tokensniffer(self, tokensniffer):
+        if tokensniffer:
+            self.score = as_score(tokensniffer.get("score", 0))
+            self.similar_count = len(tokensniffer.get("similar") or [])
+        else:
+            self.score = None
+            self.similar_count = 0
+
+    def to_document(self):
+        """
+        Builds the MongoDB document; score is the only field that can hold an oversized int.
+        """
+        document = {
+            "address": self.address,
+            "deployer": self.deployer,
+            "timestamp": self.timestamp,
+            "chain": self.chain,
+            "verified": self.verified,
+            "details": {
+                "name": self.name,
+                "symbol": self.symbol,
+                "decimals": self.decimals,
+            },
+            "score": mongo_int(self.score),
+            "similar_count": self.similar_count,
+            "liquidity": self.liquidity,
+        }
+        if self.notified:
+            document["notified"] = True
+        return document
+
+    @classmethod
+    def from_document(cls, document):
+        """
+        Loads a record from a MongoDB document, including ones stored as nested dicts before records existed.
+        """
+        record = cls(document["address"], document.get("deployer"), document.get("timestamp"),
+                     document["chain"], document.get("details"))
+        record.verified = document.get("verified", False)
+        record.notified = document.get("notified", False)
+
+        if "score" in document:
+            # Already a record: read the extracted fields
+            record.score = as_score(document["score"]) if document["score"] is not None else None
+            record.similar_count = document.get("similar_count", 0)
+            record.liquidity = document.get("liquidity", "N/A")
+        else:
+            # Legacy document with nested provider dicts
+            record.set_api_checks({
+                provider: decode_payload(document.get(provider)) for provider in PROVIDERS
+            })
+            record.verified = document.get("verified", False)
+        return record
@@ -0,0 +1,129 @@
+import json
+import zlib
+from datetime import datetime, timedelta, timezone
+from pymongo import ASCENDING, ReplaceOne
+from records import encode_payload, decode_payload
+
+# Fields kept uncompressed in the archive so it can still be queried
+ARCHIVE_FIELDS = ["address", "deployer", "timestamp", "chain", "verified", "notified", "details"]
+
+
+def ensure_indexes(contracts_collection, archive_collection, payloads_collection, deployers_collection):
+    """
+    Creates the indexes used by dedup, recheck, retention and deployer stats.
+    """
+    contracts_collection.create_index("address")
+    contracts_collection.create_index([("timestamp", ASCENDING)])
+    # Documents without expires_at are never expired
+    contracts_collection.create_index("expires_at", expireAfterSeconds=0)
+    archive_collection.create_index("address", unique=True)
+    archive_collection.create_index([("timestamp", ASCENDING)])
+    payloads_collection.create_index("address", unique=True)
+    deployers_collection.create_index("deployer", unique=True)
+
+
+def payload_document(address, source_code=None, **payloads):
+    """
+    Builds the side-collection document holding a contract's source and raw provider payloads, each zlib-compressed.
+    """
+    document = {"address": address}
+    if source_code is not None:
+        document["source_code"] = zlib.compress(source_code.encode())
+    for provider, data in payloads.items():
+        document[provider] = zlib.compress(encode_payload(data)) if data is not None else None
+    return document
+
+
+def rejected_record(contract_data, reason, ttl):
+    """
+    Builds a slim record for a rejected or never-verified contract that expires after ttl seconds.
+    """
+    record = {key: contract_data.get(key) for key in ["address", "deployer", "timestamp", "chain", "details"]}
+    record["verified"] = False
+    record["rejected"] = reason
+    record["expires_at"] = datetime.now(tz=timezone.utc) + timedelta(seconds=ttl)
+    return record
+
+
+def compress_contract(contract, payloads=None):
+    """
+    Packs a contract into an archive record: indexed fields stay plain, everything else is zlib-compressed JSON.
+    payloads is the contract's side-collection document, whose fields are already compressed.
+    """
+    record = {key: contract[key] for key in ARCHIVE_FIELDS if key in contract}
+    if "score" in contract:
+        record["score"] = contract["score"]
+    elif isinstance(contract.get("tokensniffer"), dict):
+        record["score"] = contract["tokensniffer"].get("score")
+    payload = {key: value for key, value in contract.items() if key not in ARCHIVE_FIELDS and key != "_id"}
+    record["payload"] = zlib.compress(json.dumps(payload, default=str).encode())
+    if payloads:
+        record["payloads"] = {key: value for key, value in payloads.items() if key not in ("_id", "address")}
+    return record
+
+
+def decompress_contract(record):
+    """
+    Rebuilds the full contract document from an archive record.
+    """
+    contract = {key: value for key, value in record.items() if key not in ("_id", "payload", "payloads", "score")}
+    contract.update(json.loads(zlib.decompress(record["payload"])))
+    for key, value in record.get("payloads", {}).items():
+        if value is not None:
+            data = zlib.decompress(value)
+            contract[key] = data.decode() if key == "source_code" else decode_payload(data)
+    contract["archived"] = True
+    return contract
+
+
+def archive_contracts(contracts_collection, archive_collection, payloads_collection, cutoff, batch_size=500, max_batches=10):
+    """
+    Moves up to max_batches batches of contracts older than cutoff, together with their side-collection payloads,
+    from the primary collection to the compressed archive.
+    Returns the number of contracts archived.
+    """
+    archived = 0
+    for _ in range(max_batches):
+        batch = list(contracts_collection.find({
+            "timestamp": {"$lt": cutoff},
+            "expires_at": {"$exists": False},  # Rejected records are left to the TTL index
+        }).limit(batch_size))
+        if not batch:
+            return archived
+
+        addresses = [contract["address"] for contract in batch]
+        payloads = {doc["address"]: doc for doc in payloads_collection.find({"address": {"$in": addresses}})}
+        archive_collection.bulk_write([
+            ReplaceOne(
+                {"address": contract["address"]},
+                compress_contract(contract, payloads.get(contract["address"])),
+                upsert=True,
+            )
+            for contract in batch
+        ], ordered=False)
+        contracts_collection.delete_many({"_id": {"$in": [contract["_id"] for contract in batch]}})
+        payloads_collection.delete_many({"address": {"$in": addresses}})
+        archived += len(batch)
+    return archived
+
+
+def contract_exists(contracts_collection, archive_collection, address):
+    """
+    Returns True if the address is in the primary collection or the archive.
+    """
+    projection = {"_id": 1}
+    return (
+        contracts_collection.find_one({"address": address}, projection) is not None
+        or archive_collection.find_one({"address": address}, projection) is not None
+    )
+
+
+def find_contract(contracts_collection, archive_collection, address):
+    """
+    Looks up a contract in the primary collection, falling back to the archive.
+    """
+    contract = contracts_collection.find_one({"address": address})
+    if contract:
+        return contract
+    record = archive_collection.find_one({"address": address})
+    return decompress_contract(record) if record else None